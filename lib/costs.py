@@ -3,28 +3,65 @@ Cost tracking for Deal Signal experiments.
 Tracks tokens, API costs, and latency per methodology requirements.
 """
 
-from dataclasses import dataclass, asdict
-from datetime import datetime
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from functools import cached_property
 from typing import Optional
-import json
+import time
+
+import orjson
 
 
 # Pricing per 1M tokens (as of Dec 2024, update as needed)
+# cached_input: prompt tokens served from the provider's prompt cache
+# cache_write: prompt tokens written to the cache (Anthropic charges a premium)
 PRICING = {
     # Anthropic
-    "claude-3-5-sonnet-20241022": {"input": 3.00, "output": 15.00},
-    "claude-3-opus-20240229": {"input": 15.00, "output": 75.00},
-    "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.00},
+    "claude-3-5-sonnet-20241022": {
+        "input": 3.00, "output": 15.00, "cached_input": 0.30, "cache_write": 3.75
+    },
+    "claude-3-opus-20240229": {
+        "input": 15.00, "output": 75.00, "cached_input": 1.50, "cache_write": 18.75
+    },
+    "claude-3-5-haiku-20241022": {
+        "input": 0.80, "output": 4.00, "cached_input": 0.08, "cache_write": 1.00
+    },
     # OpenAI
-    "gpt-4o": {"input": 2.50, "output": 10.00},
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "gpt-4o": {"input": 2.50, "output": 10.00, "cached_input": 1.25, "cache_write": 2.50},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075, "cache_write": 0.15},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00, "cached_input": 10.00, "cache_write": 10.00},
     # Google
-    "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
-    "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+    "gemini-1.5-pro": {"input": 1.25, "output": 5.00, "cached_input": 0.3125, "cache_write": 1.25},
+    "gemini-1.5-flash": {
+        "input": 0.075, "output": 0.30, "cached_input": 0.01875, "cache_write": 0.075
+    },
+}
+
+# Costs are tracked as integer units of 1e-8 USD so totals sum exactly
+COST_UNITS_PER_USD = 100_000_000
+
+# Per-token (input, output, cached_input, cache_write) rates in thousandths of
+# a cost unit, built once so calculate_cost needs a single lookup and only
+# integer math. USD per 1M tokens * 1e5 is exact for prices with <= 5 decimals.
+_PRICING_FAST = {
+    model: (
+        round(p["input"] * 100_000),
+        round(p["output"] * 100_000),
+        round(p.get("cached_input", p["input"]) * 100_000),
+        round(p.get("cache_write", p["input"]) * 100_000),
+    )
+    for model, p in PRICING.items()
 }
 
 
+# Fallback for models without a local tokenizer. Deliberately low (typical
+# English is ~4 chars/token; Claude tokenizes financial text denser) so
+# estimates err high, which is the safe side for budget checks.
+CHARS_PER_TOKEN = 3
+
+_ENC_CACHE = {}  # model -> tiktoken encoding
+
+
 @dataclass
 class CostEntry:
     """Cost tracking for a single LLM call."""
@@ -33,11 +70,34 @@ class CostEntry:
     input_tokens: int
     output_tokens: int
     total_tokens: int
-    input_cost: float  # USD
-    output_cost: float  # USD
-    total_cost: float  # USD
+    input_cost_u: int  # 1e-8 USD
+    output_cost_u: int  # 1e-8 USD
     latency_ms: int
-    timestamp: str
+    timestamp_ns: int  # time.time_ns(), formatted only when saved
+
+    # Prompt caching (subset of input_tokens)
+    cached_input_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    @property
+    def total_cost_u(self) -> int:
+        return self.input_cost_u + self.output_cost_u
+
+    @property
+    def input_cost(self) -> float:
+        return self.input_cost_u / COST_UNITS_PER_USD
+
+    @property
+    def output_cost(self) -> float:
+        return self.output_cost_u / COST_UNITS_PER_USD
+
+    @property
+    def total_cost(self) -> float:
+        return self.total_cost_u / COST_UNITS_PER_USD
+
+    @cached_property
+    def timestamp_iso(self) -> str:
+        return _iso_from_ns(self.timestamp_ns)
 
 
 @dataclass
@@ -51,53 +111,107 @@ class RunCosts:
     total_input_tokens: int
     total_output_tokens: int
     total_tokens: int
-    total_cost: float
+    total_cost_u: int  # 1e-8 USD
     total_latency_ms: int
 
     # Averages
     avg_latency_ms: float
-    cost_per_question: float
+    cost_per_question: float  # USD
 
     # Metadata
     model: str
     started_at: str
     completed_at: str
 
+    @property
+    def total_cost(self) -> float:
+        return self.total_cost_u / COST_UNITS_PER_USD
+
 
 def calculate_cost(
     model: str,
     input_tokens: int,
     output_tokens: int,
     latency_ms: int = 0,
+    cached_input_tokens: int = 0,
+    cache_creation_tokens: int = 0,
 ) -> CostEntry:
-    """Calculate cost for a single LLM call."""
-    pricing = PRICING.get(model, {"input": 0, "output": 0})
+    """
+    Calculate cost for a single LLM call.
 
-    input_cost = (input_tokens / 1_000_000) * pricing["input"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output"]
+    input_tokens is the total prompt size; the cached_input_tokens and
+    cache_creation_tokens portions of it are billed at the cache rates.
+    """
+    pi, po, pc, pw = _PRICING_FAST.get(model, (0, 0, 0, 0))
+
+    # Rates are in thousandths of a unit; round half up to whole units
+    uncached_tokens = input_tokens - cached_input_tokens - cache_creation_tokens
+    input_cost_u = (
+        uncached_tokens * pi + cached_input_tokens * pc + cache_creation_tokens * pw + 500
+    ) // 1000
+    output_cost_u = (output_tokens * po + 500) // 1000
 
     return CostEntry(
         model=model,
         input_tokens=input_tokens,
         output_tokens=output_tokens,
         total_tokens=input_tokens + output_tokens,
-        input_cost=input_cost,
-        output_cost=output_cost,
-        total_cost=input_cost + output_cost,
+        input_cost_u=input_cost_u,
+        output_cost_u=output_cost_u,
         latency_ms=latency_ms,
-        timestamp=datetime.utcnow().isoformat(),
+        timestamp_ns=time.time_ns(),
+        cached_input_tokens=cached_input_tokens,
+        cache_creation_tokens=cache_creation_tokens,
     )
 
 
+def estimate_tokens(text: str, model: str) -> int:
+    """
+    Estimate the token count of text before sending it to model.
+
+    Uses tiktoken for OpenAI models when installed, which is exact.
+    Otherwise (including Claude and Gemini, whose tokenizers aren't
+    available locally) falls back to CHARS_PER_TOKEN, which errs toward
+    overestimating so budget checks stay conservative.
+    """
+    if model.startswith("gpt-"):
+        enc = _ENC_CACHE.get(model)
+        if enc is None:
+            try:
+                import tiktoken
+            except ImportError:
+                return -(-len(text) // CHARS_PER_TOKEN)
+            try:
+                enc = tiktoken.encoding_for_model(model)
+            except KeyError:
+                enc = tiktoken.get_encoding("o200k_base")
+            _ENC_CACHE[model] = enc
+        # Documents may contain special-token text; count it as plain text
+        return len(enc.encode(text, disallowed_special=()))
+
+    return -(-len(text) // CHARS_PER_TOKEN)  # Round up
+
+
 def aggregate_costs(entries: list[CostEntry], run_id: str) -> RunCosts:
     """Aggregate cost entries into run-level totals."""
     if not entries:
         raise ValueError("No cost entries to aggregate")
 
-    total_input = sum(e.input_tokens for e in entries)
-    total_output = sum(e.output_tokens for e in entries)
-    total_cost = sum(e.total_cost for e in entries)
-    total_latency = sum(e.latency_ms for e in entries)
+    # Single pass over entries for all totals
+    total_input = 0
+    total_output = 0
+    total_cost_u = 0
+    total_latency = 0
+    first_ns = last_ns = entries[0].timestamp_ns
+    for e in entries:
+        total_input += e.input_tokens
+        total_output += e.output_tokens
+        total_cost_u += e.input_cost_u + e.output_cost_u
+        total_latency += e.latency_ms
+        if e.timestamp_ns < first_ns:
+            first_ns = e.timestamp_ns
+        elif e.timestamp_ns > last_ns:
+            last_ns = e.timestamp_ns
 
     return RunCosts(
         run_id=run_id,
@@ -105,13 +219,13 @@ def aggregate_costs(entries: list[CostEntry], run_id: str) -> RunCosts:
         total_input_tokens=total_input,
         total_output_tokens=total_output,
         total_tokens=total_input + total_output,
-        total_cost=total_cost,
+        total_cost_u=total_cost_u,
         total_latency_ms=total_latency,
         avg_latency_ms=total_latency / len(entries),
-        cost_per_question=total_cost / len(entries),
+        cost_per_question=total_cost_u / len(entries) / COST_UNITS_PER_USD,
         model=entries[0].model,
-        started_at=entries[0].timestamp,
-        completed_at=entries[-1].timestamp,
+        started_at=_iso_from_ns(first_ns),
+        completed_at=_iso_from_ns(last_ns),
     )
 
 
@@ -124,7 +238,7 @@ def save_costs(costs: RunCosts, path: str) -> None:
             "input_tokens": costs.total_input_tokens,
             "output_tokens": costs.total_output_tokens,
             "total_tokens": costs.total_tokens,
-            "total_cost_usd": round(costs.total_cost, 4),
+            "total_cost_usd": costs.total_cost,
             "total_latency_ms": costs.total_latency_ms,
         },
         "averages": {
@@ -135,10 +249,34 @@ def save_costs(costs: RunCosts, path: str) -> None:
             "started_at": costs.started_at,
             "completed_at": costs.completed_at,
         },
-        "entries": [asdict(e) for e in costs.entries],
+        "entries": costs.entries,
     }
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    # orjson encodes entries straight from the dataclasses (no asdict() copy)
+    with open(path, "wb") as f:
+        f.write(
+            orjson.dumps(
+                data,
+                default=_cost_entry_json,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        )
+
+
+def _cost_entry_json(o) -> dict:
+    """Serialize a CostEntry with USD costs and an ISO timestamp alongside the raw fields."""
+    if isinstance(o, CostEntry):
+        d = {f.name: getattr(o, f.name) for f in fields(o)}
+        d["input_cost"] = o.input_cost
+        d["output_cost"] = o.output_cost
+        d["total_cost"] = o.total_cost
+        d["timestamp"] = o.timestamp_iso
+        return d
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _iso_from_ns(ns: int) -> str:
+    """Format a time.time_ns() value as a UTC ISO 8601 string."""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
 
 
 def format_cost_summary(costs: RunCosts) -> str:
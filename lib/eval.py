@@ -3,11 +3,16 @@ Evaluation and scoring for Deal Signal experiments.
 Implements the rubric from Methodology.md.
 """
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Optional, Literal
 from enum import Enum
 import json
 
+import orjson
+import yaml
+
+UNCATEGORIZED = "uncategorized"
+
 
 class FailureMode(Enum):
     """Failure mode classification from methodology."""
@@ -96,23 +101,79 @@ def score_response(
     )
 
 
-def aggregate_scores(scores: list[Score], run_id: str) -> EvalResult:
-    """Aggregate individual scores into run-level results."""
+def load_question_categories(path: str) -> dict[str, str]:
+    """Map question_id -> category from a ground-truth questions.yaml."""
+    with open(path) as f:
+        data = yaml.safe_load(f)
+
+    return {
+        q["id"]: category
+        for category, spec in data["categories"].items()
+        for q in spec["questions"]
+    }
+
+
+def aggregate_scores(
+    scores: list[Score],
+    run_id: str,
+    categories: Optional[dict[str, str]] = None,
+) -> EvalResult:
+    """
+    Aggregate individual scores into run-level results.
+
+    categories maps question_id -> category (see load_question_categories).
+    When given, the same metrics are also reported per category; questions
+    missing from it are grouped under UNCATEGORIZED.
+    """
     n = len(scores)
     if n == 0:
         raise ValueError("No scores to aggregate")
 
+    # Single pass over scores for all aggregates
+    accurate = 0
+    complete = 0.0
+    cited = 0
+    hallucinated = 0
+    by_category = {}  # category -> [count, accurate, complete, cited, hallucinated]
+    for s in scores:
+        a = 1 if s.accurate else 0
+        c = 1 if s.cited == 2 else 0
+        h = 1 if s.failure_mode is FailureMode.HALLUCINATION else 0
+        accurate += a
+        complete += s.complete
+        cited += c
+        hallucinated += h
+
+        if categories is not None:
+            category = categories.get(s.question_id, UNCATEGORIZED)
+            t = by_category.get(category)
+            if t is None:
+                t = by_category[category] = [0, 0, 0.0, 0, 0]
+            t[0] += 1
+            t[1] += a
+            t[2] += s.complete
+            t[3] += c
+            t[4] += h
+
+    scores_by_category = {
+        category: {
+            "count": k,
+            "accuracy_rate": a / k,
+            "completion_rate": comp / k,
+            "citation_rate": c / k,
+            "hallucination_rate": h / k,
+        }
+        for category, (k, a, comp, c, h) in by_category.items()
+    }
+
     return EvalResult(
         run_id=run_id,
         scores=scores,
-        accuracy_rate=sum(1 for s in scores if s.accurate) / n,
-        completion_rate=sum(s.complete for s in scores) / n,
-        citation_rate=sum(1 for s in scores if s.cited == 2) / n,
-        hallucination_rate=sum(
-            1 for s in scores if s.failure_mode == FailureMode.HALLUCINATION
-        )
-        / n,
-        scores_by_category={},  # TODO: implement category grouping
+        accuracy_rate=accurate / n,
+        completion_rate=complete / n,
+        citation_rate=cited / n,
+        hallucination_rate=hallucinated / n,
+        scores_by_category=scores_by_category,
     )
 
 
@@ -124,16 +185,12 @@ def save_eval(result: EvalResult, path: str) -> None:
         "completion_rate": result.completion_rate,
         "citation_rate": result.citation_rate,
         "hallucination_rate": result.hallucination_rate,
-        "scores": [
-            {
-                **asdict(s),
-                "failure_mode": s.failure_mode.value if s.failure_mode else None,
-            }
-            for s in result.scores
-        ],
+        "scores_by_category": result.scores_by_category,
+        "scores": result.scores,
     }
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    # orjson encodes Score dataclasses and FailureMode enums natively
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
 
 def load_eval(path: str) -> EvalResult:
@@ -143,10 +200,9 @@ def load_eval(path: str) -> EvalResult:
 
     scores = []
     for s in data["scores"]:
-        fm = s.pop("failure_mode")
-        score = Score(**s)
-        score.failure_mode = FailureMode(fm) if fm else None
-        scores.append(score)
+        fm = s["failure_mode"]
+        s["failure_mode"] = FailureMode(fm) if fm else None
+        scores.append(Score(**s))
 
     return EvalResult(
         run_id=data["run_id"],
@@ -5,9 +5,35 @@ Supports Claude, GPT, and other providers with unified interface.
 
 import os
 import json
+import asyncio
+import email.utils
+import random
+import threading
+import time
 from datetime import datetime
 from typing import Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+
+import orjson
+
+from .costs import calculate_cost, estimate_tokens
+
+# Anthropic ignores cache_control on prompts shorter than this
+CACHE_MIN_TOKENS = 1024
+
+# Sync clients are created once and reused so calls share a connection pool
+_CLIENT_LOCK = threading.Lock()
+_ANTHROPIC_CLIENT = None
+_OPENAI_CLIENT = None
+
+# Retry transient failures (rate limits, connection errors, 5xx) with
+# exponential backoff + jitter, preferring the provider's Retry-After when
+# given. SDK-level retries are disabled on our clients so
+# LLMResponse.retries counts every retry.
+MAX_ATTEMPTS = 6
+RETRY_INITIAL_S = 1.0
+RETRY_MAX_S = 30.0
+RETRY_AFTER_MAX_S = 60.0  # Longer Retry-After values fall back to backoff, as in the SDKs
 
 
 @dataclass
@@ -22,6 +48,12 @@ class LLMResponse:
     timestamp: str
     raw_response: Optional[dict] = None
 
+    # Prompt caching (subset of input_tokens)
+    cached_input_tokens: int = 0  # Read from provider cache
+    cache_creation_tokens: int = 0  # Written to provider cache
+
+    retries: int = 0  # Failed attempts before this response
+
 
 @dataclass
 class LLMConfig:
@@ -43,10 +75,6 @@ def call_llm(
 
     Returns standardized LLMResponse regardless of provider.
     """
-    import time
-
-    start = time.time()
-
     if config.provider == "anthropic":
         response = _call_anthropic(prompt, config, system)
     elif config.provider == "openai":
@@ -54,23 +82,114 @@ def call_llm(
     else:
         raise ValueError(f"Unknown provider: {config.provider}")
 
-    response.latency_ms = int((time.time() - start) * 1000)
+    # latency_ms is set from the successful attempt, excluding retry backoff
     response.timestamp = datetime.utcnow().isoformat()
 
     return response
 
 
+def call_llm_with_budget(
+    prompt: str,
+    config: LLMConfig,
+    max_cost_usd: float,
+    system: Optional[str] = None,
+) -> LLMResponse:
+    """
+    call_llm, but refuse up front if the estimated input cost exceeds
+    max_cost_usd. Output tokens are unknown until the call returns and
+    aren't included in the estimate.
+    """
+    input_tokens = estimate_tokens(prompt, config.model)
+    if system:
+        input_tokens += estimate_tokens(system, config.model)
+
+    estimated = calculate_cost(config.model, input_tokens, 0).total_cost
+    if estimated > max_cost_usd:
+        raise ValueError(
+            f"Estimated input cost ${estimated:.6f} ({input_tokens:,} tokens) "
+            f"exceeds budget ${max_cost_usd:.6f}"
+        )
+
+    return call_llm(prompt, config, system)
+
+
 def _call_anthropic(
     prompt: str, config: LLMConfig, system: Optional[str]
 ) -> LLMResponse:
     """Call Anthropic Claude API."""
+    anthropic = _import_anthropic()
+    client = _anthropic_client()
+    kwargs = _anthropic_kwargs(prompt, config, system)
+    response, retries, latency_ms = _with_retries(
+        lambda: client.messages.create(**kwargs), anthropic
+    )
+    result = _anthropic_response(response, config)
+    result.retries = retries
+    result.latency_ms = latency_ms
+    return result
+
+
+def _call_openai(prompt: str, config: LLMConfig, system: Optional[str]) -> LLMResponse:
+    """Call OpenAI API."""
+    openai = _import_openai()
+    client = _openai_client()
+    kwargs = _openai_kwargs(prompt, config, system)
+    response, retries, latency_ms = _with_retries(
+        lambda: client.chat.completions.create(**kwargs), openai
+    )
+    result = _openai_response(response, config)
+    result.retries = retries
+    result.latency_ms = latency_ms
+    return result
+
+
+def init_clients(providers: tuple[str, ...] = ("anthropic", "openai")) -> None:
+    """Create provider clients up front, e.g. before starting worker threads."""
+    for provider in providers:
+        if provider == "anthropic":
+            _anthropic_client()
+        elif provider == "openai":
+            _openai_client()
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+
+
+def _import_anthropic():
     try:
         import anthropic
     except ImportError:
         raise ImportError("pip install anthropic")
+    return anthropic
+
+
+def _import_openai():
+    try:
+        import openai
+    except ImportError:
+        raise ImportError("pip install openai")
+    return openai
 
-    client = anthropic.Anthropic()
 
+def _anthropic_client():
+    global _ANTHROPIC_CLIENT
+    if _ANTHROPIC_CLIENT is None:
+        with _CLIENT_LOCK:
+            if _ANTHROPIC_CLIENT is None:
+                _ANTHROPIC_CLIENT = _import_anthropic().Anthropic(max_retries=0)
+    return _ANTHROPIC_CLIENT
+
+
+def _openai_client():
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        with _CLIENT_LOCK:
+            if _OPENAI_CLIENT is None:
+                _OPENAI_CLIENT = _import_openai().OpenAI(max_retries=0)
+    return _OPENAI_CLIENT
+
+
+def _anthropic_kwargs(prompt: str, config: LLMConfig, system: Optional[str]) -> dict:
+    """Build messages.create() arguments for Anthropic."""
     messages = [{"role": "user", "content": prompt}]
 
     kwargs = {
@@ -80,57 +199,273 @@ def _call_anthropic(
         "messages": messages,
     }
     if system:
-        kwargs["system"] = system
+        if estimate_tokens(system, config.model) >= CACHE_MIN_TOKENS:
+            # Shared system prompt / document context is reused across
+            # questions, so mark it cacheable.
+            kwargs["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        else:
+            kwargs["system"] = system
+    return kwargs
 
-    response = client.messages.create(**kwargs)
+
+def _anthropic_response(response, config: LLMConfig) -> LLMResponse:
+    """Convert an Anthropic message into an LLMResponse."""
+    usage = response.usage
+    cached = usage.cache_read_input_tokens or 0
+    created = usage.cache_creation_input_tokens or 0
 
     return LLMResponse(
         content=response.content[0].text,
         model=config.model,
-        input_tokens=response.usage.input_tokens,
-        output_tokens=response.usage.output_tokens,
+        # Anthropic reports cache reads/writes separately; fold them in so
+        # input_tokens means total prompt tokens for every provider.
+        input_tokens=usage.input_tokens + cached + created,
+        output_tokens=usage.output_tokens,
         latency_ms=0,  # Set by caller
         timestamp="",  # Set by caller
         raw_response=response.model_dump(),
+        cached_input_tokens=cached,
+        cache_creation_tokens=created,
     )
 
 
-def _call_openai(prompt: str, config: LLMConfig, system: Optional[str]) -> LLMResponse:
-    """Call OpenAI API."""
-    try:
-        import openai
-    except ImportError:
-        raise ImportError("pip install openai")
-
-    client = openai.OpenAI()
+def _openai_kwargs(prompt: str, config: LLMConfig, system: Optional[str]) -> dict:
+    """
+    Build chat.completions.create() arguments for OpenAI.
 
+    OpenAI caches prompt prefixes automatically, so the system prompt
+    goes first to keep the shared prefix stable across questions.
+    """
     messages = []
     if system:
         messages.append({"role": "system", "content": system})
     messages.append({"role": "user", "content": prompt})
 
-    response = client.chat.completions.create(
-        model=config.model,
-        messages=messages,
-        temperature=config.temperature,
-        max_tokens=config.max_tokens,
-    )
+    return {
+        "model": config.model,
+        "messages": messages,
+        "temperature": config.temperature,
+        "max_tokens": config.max_tokens,
+    }
+
+
+def _openai_response(response, config: LLMConfig) -> LLMResponse:
+    """Convert an OpenAI chat completion into an LLMResponse."""
+    usage = response.usage
+    details = usage.prompt_tokens_details
+    cached = (details.cached_tokens or 0) if details else 0
 
     return LLMResponse(
         content=response.choices[0].message.content,
         model=config.model,
-        input_tokens=response.usage.prompt_tokens,
-        output_tokens=response.usage.completion_tokens,
+        input_tokens=usage.prompt_tokens,
+        output_tokens=usage.completion_tokens,
         latency_ms=0,
         timestamp="",
         raw_response=response.model_dump(),
+        cached_input_tokens=cached,
+    )
+
+
+def call_llm_batch(
+    prompts: list[str],
+    config: LLMConfig,
+    system: Optional[str] = None,
+    max_concurrency: int = 8,
+) -> list[LLMResponse | Exception]:
+    """
+    Call an LLM with many prompts concurrently.
+
+    Sync wrapper around call_llm_batch_async. Results are returned in the
+    same order as prompts; a prompt that failed gets its exception in
+    place of a response, so one bad request doesn't discard the rest.
+    """
+    return asyncio.run(
+        call_llm_batch_async(prompts, config, system, max_concurrency)
+    )
+
+
+async def call_llm_batch_async(
+    prompts: list[str],
+    config: LLMConfig,
+    system: Optional[str] = None,
+    max_concurrency: int = 8,
+) -> list[LLMResponse | Exception]:
+    """
+    Async variant of call_llm_batch for use inside a running event loop.
+
+    At most max_concurrency requests are in flight at once, to stay
+    under provider rate limits. Every request runs to completion; failed
+    ones are returned as their exception, in prompt order.
+    """
+    if config.provider == "anthropic":
+        client = _async_anthropic_client()
+        call = _acall_anthropic
+    elif config.provider == "openai":
+        client = _async_openai_client()
+        call = _acall_openai
+    else:
+        raise ValueError(f"Unknown provider: {config.provider}")
+
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(prompt: str) -> LLMResponse:
+        async with sem:
+            response = await call(client, prompt, config, system)
+        response.timestamp = datetime.utcnow().isoformat()
+        return response
+
+    # One client per batch: async clients hold a connection pool bound to
+    # the event loop, so they can't be reused across asyncio.run() calls.
+    # return_exceptions keeps completed (already billed) responses when a
+    # sibling fails, and waits for every task before the pool is closed.
+    async with client:
+        return await asyncio.gather(
+            *(run_one(p) for p in prompts), return_exceptions=True
+        )
+
+
+def _async_anthropic_client():
+    return _import_anthropic().AsyncAnthropic(max_retries=0)
+
+
+def _async_openai_client():
+    return _import_openai().AsyncOpenAI(max_retries=0)
+
+
+async def _acall_anthropic(
+    client, prompt: str, config: LLMConfig, system: Optional[str]
+) -> LLMResponse:
+    """Call Anthropic Claude API with an async client."""
+    anthropic = _import_anthropic()
+    kwargs = _anthropic_kwargs(prompt, config, system)
+    response, retries, latency_ms = await _awith_retries(
+        lambda: client.messages.create(**kwargs), anthropic
+    )
+    result = _anthropic_response(response, config)
+    result.retries = retries
+    result.latency_ms = latency_ms
+    return result
+
+
+async def _acall_openai(
+    client, prompt: str, config: LLMConfig, system: Optional[str]
+) -> LLMResponse:
+    """Call OpenAI API with an async client."""
+    openai = _import_openai()
+    kwargs = _openai_kwargs(prompt, config, system)
+    response, retries, latency_ms = await _awith_retries(
+        lambda: client.chat.completions.create(**kwargs), openai
     )
+    result = _openai_response(response, config)
+    result.retries = retries
+    result.latency_ms = latency_ms
+    return result
+
+
+def _with_retries(request, sdk):
+    """
+    Run request(), retrying transient errors.
+
+    Returns (response, retries, latency_ms); latency covers only the
+    successful attempt, not failed attempts or backoff.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        start = time.perf_counter()
+        try:
+            response = request()
+        except Exception as e:
+            if attempt + 1 == MAX_ATTEMPTS or not _is_retryable(e, sdk):
+                raise
+            delay = _retry_delay(attempt, e)
+        else:
+            return response, attempt, int((time.perf_counter() - start) * 1000)
+        time.sleep(delay)
+
+
+async def _awith_retries(request, sdk):
+    """Async variant of _with_retries; request() returns an awaitable."""
+    for attempt in range(MAX_ATTEMPTS):
+        start = time.perf_counter()
+        try:
+            response = await request()
+        except Exception as e:
+            if attempt + 1 == MAX_ATTEMPTS or not _is_retryable(e, sdk):
+                raise
+            delay = _retry_delay(attempt, e)
+        else:
+            return response, attempt, int((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(delay)
+
+
+def _is_retryable(exc: Exception, sdk) -> bool:
+    """Same policy as the SDKs' built-in retries; sdk is the anthropic/openai module."""
+    # The server can explicitly say whether a retry will help
+    should_retry = _error_headers(exc).get("x-should-retry")
+    if should_retry == "true":
+        return True
+    if should_retry == "false":
+        return False
+
+    if isinstance(exc, sdk.APIConnectionError):  # Includes timeouts
+        return True
+    if isinstance(exc, sdk.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+def _retry_delay(attempt: int, exc: Optional[Exception] = None) -> float:
+    """Seconds to wait after the given failed attempt (0-based)."""
+    retry_after = _retry_after_s(exc)
+    if retry_after is not None and 0 < retry_after <= RETRY_AFTER_MAX_S:
+        return retry_after
+    return min(RETRY_MAX_S, RETRY_INITIAL_S * 2**attempt + random.uniform(0, 1))
+
+
+def _retry_after_s(exc: Optional[Exception]) -> Optional[float]:
+    """Parse retry-after-ms / Retry-After (seconds or HTTP date) from an API error."""
+    headers = _error_headers(exc)
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return when.timestamp() - time.time()
+
+
+def _error_headers(exc: Optional[Exception]):
+    """HTTP response headers of an API status error, or {} if there are none."""
+    response = getattr(exc, "response", None)
+    return response.headers if response is not None else {}
 
 
 def save_response(response: LLMResponse, path: str) -> None:
     """Save LLM response to JSON file."""
-    with open(path, "w") as f:
-        json.dump(asdict(response), f, indent=2)
+    # orjson encodes the dataclass directly, without copying raw_response
+    with open(path, "wb") as f:
+        f.write(
+            orjson.dumps(
+                response,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            )
+        )
 
 
 def load_response(path: str) -> LLMResponse:
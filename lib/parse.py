@@ -4,11 +4,31 @@ Supports multiple parsing approaches for Layer 3 comparison.
 """
 
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
 import json
 
+import orjson
+
+# Optional parsers, imported once at module load (marker stays lazy: it pulls
+# in torch). Process pool workers then reuse the module instead of
+# re-running the import machinery per page.
+try:
+    from pypdf import PdfReader as _PdfReader
+except ImportError:
+    _PdfReader = None
+
+try:
+    import pdfplumber as _pdfplumber
+except ImportError:
+    _pdfplumber = None
+
+# Below this many pages, worker startup costs more than it saves
+PARALLEL_MIN_PAGES = 4
+
 
 @dataclass
 class ParsedDocument:
@@ -27,12 +47,10 @@ def parse_pdf_basic(path: str) -> ParsedDocument:
     Basic PDF text extraction using pypdf.
     Lowest cost, lowest quality baseline.
     """
-    try:
-        from pypdf import PdfReader
-    except ImportError:
+    if _PdfReader is None:
         raise ImportError("pip install pypdf")
 
-    reader = PdfReader(path)
+    reader = _PdfReader(path)
     pages = [page.extract_text() or "" for page in reader.pages]
 
     return ParsedDocument(
@@ -48,31 +66,47 @@ def parse_pdf_basic(path: str) -> ParsedDocument:
     )
 
 
-def parse_pdf_pdfplumber(path: str) -> ParsedDocument:
+def parse_pdf_pdfplumber(path: str, max_workers: Optional[int] = None) -> ParsedDocument:
     """
     PDF extraction using pdfplumber.
     Better table extraction than pypdf.
+
+    Table extraction is CPU-bound, so pages are split into one contiguous
+    range per worker and extracted in a process pool (max_workers defaults
+    to the CPU count).
     """
-    try:
-        import pdfplumber
-    except ImportError:
+    if _pdfplumber is None:
         raise ImportError("pip install pdfplumber")
 
+    with _pdfplumber.open(path) as pdf:
+        num_pages = len(pdf.pages)
+        parallel = num_pages >= PARALLEL_MIN_PAGES and max_workers != 1
+        if not parallel:
+            results = [_extract_plumber_page(page) for page in pdf.pages]
+
+    if parallel:
+        workers = min(max_workers or os.cpu_count() or 1, num_pages)
+        bounds = [num_pages * w // workers for w in range(workers + 1)]
+
+        # pdfplumber objects don't pickle, so each worker reopens the file,
+        # once for its whole page range
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            chunks = ex.map(partial(_extract_page_range, path), bounds[:-1], bounds[1:])
+            results = [page for chunk in chunks for page in chunk]
+
     pages = []
     tables = []
+    for i, (text, page_tables) in enumerate(results):
+        pages.append(text)
 
-    with pdfplumber.open(path) as pdf:
-        for i, page in enumerate(pdf.pages):
-            pages.append(page.extract_text() or "")
-
-            # Extract tables from this page
-            for table in page.extract_tables():
-                tables.append(
-                    {
-                        "page": i + 1,
-                        "data": table,
-                    }
-                )
+        # Extract tables from this page
+        for table in page_tables:
+            tables.append(
+                {
+                    "page": i + 1,
+                    "data": table,
+                }
+            )
 
     return ParsedDocument(
         source_path=path,
@@ -84,20 +118,37 @@ def parse_pdf_pdfplumber(path: str) -> ParsedDocument:
     )
 
 
-def parse_pdf_marker(path: str) -> ParsedDocument:
+def _extract_page_range(path: str, start: int, stop: int) -> list[tuple[str, list]]:
+    """Extract text and tables from pages [start, stop) (process pool worker)."""
+    # pages= limits pdfplumber to building Page objects for this range only
+    with _pdfplumber.open(path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [_extract_plumber_page(page) for page in pdf.pages]
+
+
+def _extract_plumber_page(page) -> tuple[str, list]:
+    """Extract text and tables from an open pdfplumber page."""
+    return page.extract_text() or "", page.extract_tables()
+
+
+def parse_pdf_marker(
+    path: str,
+    device: Optional[str] = None,
+    dtype: Optional[str] = None,
+) -> ParsedDocument:
     """
     PDF extraction using marker (ML-based).
     Higher quality, handles complex layouts.
+
+    device is a torch device ("cuda", "mps", "cpu"); marker picks one when
+    None. dtype is "bf16", "fp16" or "fp32". Models are loaded once per
+    (device, dtype) and reused across documents.
     """
-    try:
-        from marker.converters.pdf import PdfConverter
-        from marker.models import create_model_dict
-    except ImportError:
-        raise ImportError("pip install marker-pdf")
+    converter = _marker_converter(device, dtype)
+
+    import torch
 
-    models = create_model_dict()
-    converter = PdfConverter(artifact_dict=models)
-    result = converter(path)
+    with torch.inference_mode():
+        result = converter(path)
 
     return ParsedDocument(
         source_path=path,
@@ -109,6 +160,25 @@ def parse_pdf_marker(path: str) -> ParsedDocument:
     )
 
 
+@lru_cache(maxsize=None)
+def _marker_converter(device: Optional[str], dtype: Optional[str]):
+    """Load marker models once per device/dtype."""
+    try:
+        from marker.converters.pdf import PdfConverter
+        from marker.models import create_model_dict
+    except ImportError:
+        raise ImportError("pip install marker-pdf")
+
+    import torch
+
+    dtypes = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}
+    if dtype is not None and dtype not in dtypes:
+        raise ValueError(f"Unknown dtype: {dtype}")
+
+    models = create_model_dict(device=device, dtype=dtypes.get(dtype))
+    return PdfConverter(artifact_dict=models)
+
+
 def save_parsed(doc: ParsedDocument, output_dir: str) -> None:
     """Save parsed document to directory."""
     os.makedirs(output_dir, exist_ok=True)
@@ -130,23 +200,29 @@ def save_parsed(doc: ParsedDocument, output_dir: str) -> None:
     # Save tables
     if doc.tables:
         tables_path = os.path.join(output_dir, "tables.json")
-        with open(tables_path, "w") as f:
-            json.dump(doc.tables, f, indent=2)
+        with open(tables_path, "wb") as f:
+            f.write(orjson.dumps(doc.tables, option=orjson.OPT_INDENT_2))
 
     # Save metadata
     meta_path = os.path.join(output_dir, "metadata.json")
-    with open(meta_path, "w") as f:
-        json.dump(
-            {
-                "source_path": doc.source_path,
-                "parser": doc.parser,
-                "metadata": doc.metadata,
-            },
-            f,
-            indent=2,
+    with open(meta_path, "wb") as f:
+        f.write(
+            orjson.dumps(
+                {
+                    "source_path": doc.source_path,
+                    "parser": doc.parser,
+                    "metadata": doc.metadata,
+                },
+                option=orjson.OPT_INDENT_2,
+            )
         )
 
 
+def _read_text(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
 def load_parsed(output_dir: str) -> ParsedDocument:
     """Load parsed document from directory."""
     text_path = os.path.join(output_dir, "text.txt")
@@ -168,9 +244,12 @@ def load_parsed(output_dir: str) -> ParsedDocument:
     pages = []
     pages_dir = os.path.join(output_dir, "pages")
     if os.path.isdir(pages_dir):
-        for page_file in sorted(os.listdir(pages_dir)):
-            with open(os.path.join(pages_dir, page_file)) as f:
-                pages.append(f.read())
+        with os.scandir(pages_dir) as it:
+            page_files = sorted(e.path for e in it if e.name.startswith("page_"))
+
+        # File reads release the GIL, so overlap them across threads
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            pages = list(ex.map(_read_text, page_files))
 
     return ParsedDocument(
         source_path=meta["source_path"],